@@ -1,22 +1,54 @@
 import argparse
 import ast
+import datetime
+import itertools
+import json
 import logging
+import re
 import sys
+import threading
 import time
+import uuid
 from importlib.resources import files
 from os import environ
 
 import psycopg
 import requests
+import stomp
+from psycopg import sql
+
+from artemis_data_collector.history import HistoryStore, start_history_server
+from artemis_data_collector.log import LOG_FORMATS, setup_logging
 
 logger = logging.getLogger("AtremisDataCollector")
 
+MESSAGE_COUNT_TABLE = "report_statusqueuemessagecount"
+PARTITION_INTERVALS = ("month", "week")
+# how often the running collector checks the partitions (seconds)
+PARTITION_MAINTENANCE_PERIOD = 3600
+# factor the adaptive interval grows by while all monitored queues are quiet
+ADAPTIVE_BACKOFF_FACTOR = 2
+# NOTIFY payloads must be shorter than 8000 bytes
+NOTIFY_PAYLOAD_LIMIT = 7999
+ARTEMIS_TRANSPORTS = ("jolokia", "stomp")
+MANAGEMENT_ADDRESS = "activemq.management"
+# listQueues filter matching every queue, as sent by the management console
+LIST_QUEUES_FILTER = json.dumps({"field": "", "operation": "", "value": ""})
+LIST_QUEUES_PAGE_SIZE = 1000
+
 
 def initialize_database_tables(config):
     """Initializes the tables in the database from sql files. This will fail if the tables already exist.
 
+    If ``partition_interval`` is set the message count table is created as a range partitioned table on
+    ``created_on`` and the initial partitions are created.
+
     WebMon should have already created the tables so this is mostly for testing."""
     logger.info("Initializing tables")
+    partition_interval = getattr(config, "partition_interval", None)
+    message_count_sql = (
+        "report_statusqueuemessagecount_partitioned.sql" if partition_interval else "report_statusqueuemessagecount.sql"
+    )
     with psycopg.connect(
         dbname=config.database_name,
         host=config.database_hostname,
@@ -27,15 +59,307 @@ def initialize_database_tables(config):
         with conn.cursor() as cur:
             cur.execute(files("artemis_data_collector.sql").joinpath("report_statusqueue.sql").read_text())
             conn.commit()
-            cur.execute(files("artemis_data_collector.sql").joinpath("report_statusqueuemessagecount.sql").read_text())
+            cur.execute(files("artemis_data_collector.sql").joinpath(message_count_sql).read_text())
             conn.commit()
+            cur.execute(files("artemis_data_collector.sql").joinpath("report_statusqueue_latest.sql").read_text())
+            conn.commit()
+
+        if partition_interval:
+            maintain_partitions(
+                conn,
+                partition_interval,
+                premake=config.partition_premake,
+                retention=config.partition_retention,
+                detach=config.partition_detach,
+            )
+
+
+def partition_start(interval, day):
+    """Returns the first day of the month or ISO week containing ``day``"""
+    if interval == "month":
+        return day.replace(day=1)
+    if interval == "week":
+        return day - datetime.timedelta(days=day.weekday())
+    raise ValueError(f"Unknown partition interval {interval}")
+
+
+def shift_partition_start(interval, start, periods):
+    """Returns the start of the partition ``periods`` months or weeks away from ``start``"""
+    if interval == "month":
+        month = start.year * 12 + start.month - 1 + periods
+        return datetime.date(month // 12, month % 12 + 1, 1)
+    if interval == "week":
+        return start + datetime.timedelta(weeks=periods)
+    raise ValueError(f"Unknown partition interval {interval}")
+
+
+def partition_name(interval, start):
+    """Returns the name of the partition starting at ``start``, e.g. report_statusqueuemessagecount_p2024_05 for a
+    month or report_statusqueuemessagecount_p2024w18 for an ISO week"""
+    if interval == "month":
+        return f"{MESSAGE_COUNT_TABLE}_p{start.year:04d}_{start.month:02d}"
+    if interval == "week":
+        year, week, _ = start.isocalendar()
+        return f"{MESSAGE_COUNT_TABLE}_p{year:04d}w{week:02d}"
+    raise ValueError(f"Unknown partition interval {interval}")
+
+
+def parse_partition_name(interval, name):
+    """Returns the start date of the partition from its name, or None if the name is not one of ours"""
+    if interval == "month":
+        match = re.fullmatch(rf"{MESSAGE_COUNT_TABLE}_p(\d{{4}})_(\d{{2}})", name)
+        if match:
+            return datetime.date(int(match[1]), int(match[2]), 1)
+    elif interval == "week":
+        match = re.fullmatch(rf"{MESSAGE_COUNT_TABLE}_p(\d{{4}})w(\d{{2}})", name)
+        if match:
+            return datetime.date.fromisocalendar(int(match[1]), int(match[2]), 1)
+    return None
+
+
+def expired_partitions(interval, names, current, retention):
+    """Returns the sorted partition names which start more than ``retention`` periods before ``current``"""
+    cutoff = shift_partition_start(interval, current, -retention)
+    expired = []
+    for name in sorted(names):
+        start = parse_partition_name(interval, name)
+        if start is not None and start < cutoff:
+            expired.append(name)
+    return expired
+
+
+def maintain_partitions(conn, interval, premake=3, retention=None, detach=False, today=None):
+    """Creates the partitions of report_statusqueuemessagecount for the current and the next ``premake`` periods
+    and removes the partitions that are entirely older than ``retention`` periods, with ``retention=0`` only the
+    current partition is kept. If ``retention`` is None no partition is removed.
+
+    Expired partitions are dropped, or only detached from the parent table if ``detach`` is True so that they can
+    be archived. Dropping a whole partition is a metadata-only operation, unlike deleting rows from one big table.
+
+    Returns a tuple of lists with the names of the created and expired partitions."""
+    if premake < 0 or (retention is not None and retention < 0):
+        raise ValueError("premake and retention must not be negative")
+    if today is None:
+        today = datetime.date.today()
+    current = partition_start(interval, today)
+
+    with conn.cursor() as cur:
+        cur.execute(
+            "SELECT c.relname FROM pg_catalog.pg_inherits i "
+            "JOIN pg_catalog.pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = 'public.report_statusqueuemessagecount'::regclass"
+        )
+        existing = {row[0] for row in cur.fetchall()}
+
+        created = []
+        for period in range(premake + 1):
+            start = shift_partition_start(interval, current, period)
+            name = partition_name(interval, start)
+            if name in existing:
+                continue
+            cur.execute(
+                sql.SQL("CREATE TABLE {} PARTITION OF {} FOR VALUES FROM ({}) TO ({})").format(
+                    sql.Identifier("public", name),
+                    sql.Identifier("public", MESSAGE_COUNT_TABLE),
+                    sql.Literal(start),
+                    sql.Literal(shift_partition_start(interval, start, 1)),
+                )
+            )
+            created.append(name)
+
+        expired = [] if retention is None else expired_partitions(interval, existing, current, retention)
+        for name in expired:
+            if detach:
+                cur.execute(
+                    sql.SQL("ALTER TABLE {} DETACH PARTITION {}").format(
+                        sql.Identifier("public", MESSAGE_COUNT_TABLE), sql.Identifier("public", name)
+                    )
+                )
+            else:
+                cur.execute(sql.SQL("DROP TABLE {}").format(sql.Identifier("public", name)))
+    conn.commit()
+
+    if created:
+        logger.info(f"Created partitions: {' '.join(created)}")
+    if expired:
+        logger.info(f"{'Detached' if detach else 'Dropped'} partitions: {' '.join(expired)}")
+    return created, expired
+
+
+def parse_endpoint(endpoint):
+    """Returns (host, port) from a host:port string"""
+    host, _, port = endpoint.rpartition(":")
+    if not host or not port.isdigit():
+        raise ValueError(f"Invalid STOMP endpoint {endpoint}, expected host:port")
+    return host, int(port)
+
+
+def notify_payload(data, interval=None):
+    """Returns the compact JSON NOTIFY payload for a batch of (queue_id, message_count).
+
+    If the batch does not fit in the payload limit the counts are replaced by null, telling listeners to read the
+    batch from the database instead."""
+    payload = {"counts": {str(queue_id): message_count for queue_id, message_count in data}}
+    if interval is not None:
+        payload["interval"] = interval
+    text = json.dumps(payload, separators=(",", ":"))
+    if len(text.encode()) > NOTIFY_PAYLOAD_LIMIT:
+        logger.warning("Batch of %d queues is too large for a notification, sending it without counts", len(data))
+        payload["counts"] = None
+        text = json.dumps(payload, separators=(",", ":"))
+    return text
+
+
+class StompManagementClient(stomp.ConnectionListener):
+    """Reads attributes from ActiveMQ Artemis by sending management messages to the ``activemq.management`` address
+    over a persistent STOMP connection.
+
+    The replies are received on a private reply queue. ``endpoints`` is a list of (host, port) which are tried in
+    order when (re)connecting, so the second endpoint acts as the failover broker."""
+
+    def __init__(self, endpoints, user, password, timeout):
+        self.endpoints = endpoints
+        self.user = user
+        self.password = password
+        self.timeout = timeout
+        self.reply_queue = f"artemis_data_collector.reply.{uuid.uuid4().hex}"
+        self._conn = None
+        self._correlation_ids = itertools.count()
+        self._expected_correlation_id = None
+        self._reply = None
+        self._reply_received = threading.Condition()
+
+    def on_message(self, frame):
+        with self._reply_received:
+            correlation_id = frame.headers.get("correlation-id")
+            if correlation_id is not None and correlation_id != self._expected_correlation_id:
+                # late reply to a request that already timed out
+                logger.debug("Discarding management reply %s", correlation_id)
+                return
+            self._reply = frame
+            self._reply_received.notify_all()
+
+    def on_disconnected(self):
+        logger.warning("Disconnected from STOMP broker")
+
+    def connect(self):
+        """Connect to the first available endpoint if not already connected"""
+        if self._conn is not None and self._conn.is_connected():
+            return
+        logger.debug("Connecting to STOMP broker %s", self.endpoints)
+        conn = stomp.Connection(
+            host_and_ports=self.endpoints,
+            prefer_localhost=False,
+            reconnect_attempts_max=1,
+            timeout=self.timeout,
+            auto_content_length=False,
+        )
+        conn.set_listener("management", self)
+        conn.connect(self.user, self.password, wait=True)
+        conn.subscribe(
+            destination=self.reply_queue, id="management-reply", ack="auto", headers={"subscription-type": "ANYCAST"}
+        )
+        self._conn = conn
+
+    def disconnect(self):
+        if self._conn is not None:
+            try:
+                self._conn.disconnect()
+            except stomp.exception.StompException:
+                pass
+            self._conn = None
+
+    def request(self, resource, attribute=None, operation=None, params=()):
+        """Returns the value of ``attribute`` of the management ``resource``, e.g. ("broker", "AddressNames"), or the
+        result of invoking ``operation`` with ``params`` on it.
+
+        Raises TimeoutError if no reply arrives in time and RuntimeError if the broker reports a failure."""
+        self.connect()
+        correlation_id = str(next(self._correlation_ids))
+        headers = {
+            "_AMQ_ResourceName": resource,
+            "reply-to": self.reply_queue,
+            "correlation-id": correlation_id,
+            "destination-type": "ANYCAST",
+        }
+        if operation is not None:
+            headers["_AMQ_OperationName"] = operation
+        else:
+            headers["_AMQ_Attribute"] = attribute
+        with self._reply_received:
+            self._expected_correlation_id = correlation_id
+            self._reply = None
+            self._conn.send(MANAGEMENT_ADDRESS, json.dumps(list(params)), headers=headers)
+            if not self._reply_received.wait_for(lambda: self._reply is not None, timeout=self.timeout):
+                raise TimeoutError(f"No management reply for {resource} {operation or attribute}")
+            reply = self._reply
+
+        if reply.headers.get("_AMQ_OperationSucceeded") != "true":
+            raise RuntimeError(
+                f"Management request for {resource} {operation or attribute} failed: {str(reply.body)[:512]}"
+            )
+        return json.loads(reply.body)[0]
+
+    def get_address_names(self):
+        """Returns the list of addresses on the broker, or None on failure"""
+        try:
+            return self._with_failover(lambda: self.request("broker", attribute="AddressNames"))
+        except RuntimeError as e:
+            logger.error("STOMP management error: %s", e)
+            return None
+
+    def get_message_counts(self, addresses):
+        """Returns a map of address to message count, or None on failure.
+
+        All counts are read with the broker's listQueues operation, one request per LIST_QUEUES_PAGE_SIZE queues,
+        and the message counts of the queues bound to each address are summed like the address MessageCount
+        attribute does. Addresses without any queue are left out."""
+        addresses = set(addresses)
+
+        def read_counts():
+            counts = {}
+            page = 1
+            while True:
+                result = json.loads(
+                    self.request(
+                        "broker", operation="listQueues", params=(LIST_QUEUES_FILTER, page, LIST_QUEUES_PAGE_SIZE)
+                    )
+                )
+                for queue in result["data"]:
+                    if queue["address"] in addresses:
+                        counts[queue["address"]] = counts.get(queue["address"], 0) + int(queue["messageCount"])
+                if page * LIST_QUEUES_PAGE_SIZE >= int(result["count"]):
+                    return counts
+                page += 1
+
+        try:
+            return self._with_failover(read_counts)
+        except RuntimeError as e:
+            logger.error("STOMP management error: %s", e)
+            return None
+
+    def _with_failover(self, request):
+        """Run ``request``, reconnecting once through the list of endpoints if the connection fails"""
+        for _ in range(2):
+            try:
+                return request()
+            except (stomp.exception.StompException, OSError):  # OSError includes TimeoutError
+                logger.exception("STOMP management connection error")
+                self.disconnect()
+        return None
 
 
 class ArtemisDataCollector:
-    def __init__(self, config):
+    def __init__(self, config, history=None):
         logger.info("Initializing ArtemisDataCollector")
         self.config = config
+        # optional HistoryStore which keeps the recent samples in memory
+        self.history = history
         self._conn = None
+        self._next_partition_maintenance = 0
+        # state of the adaptive sampling interval
+        self._interval = None
+        self._last_counts = {}
 
         # common session for all requests
         self._session = requests.Session()
@@ -48,6 +372,16 @@ class ArtemisDataCollector:
         if hasattr(self.config, "artemis_failover_url") and self.config.artemis_failover_url:
             self.base_failover_url = f"{self.config.artemis_failover_url}/console/jolokia/read/org.apache.activemq.artemis:broker=%22{self.config.artemis_broker_name}%22"  # noqa: E501
 
+        # Optional persistent STOMP connection to the management address instead of Jolokia
+        self._management = None
+        if getattr(self.config, "artemis_transport", "jolokia") == "stomp":
+            endpoints = [parse_endpoint(self.config.artemis_stomp_endpoint)]
+            if self.config.artemis_stomp_failover_endpoint:
+                endpoints.append(parse_endpoint(self.config.artemis_stomp_failover_endpoint))
+            self._management = StompManagementClient(
+                endpoints, self.config.artemis_user, self.config.artemis_password, self.config.http_timeout
+            )
+
         database_statusqueues = self.get_database_statusqueues()
         amq_queues = self.get_activemq_queues()
         if amq_queues is None:
@@ -69,6 +403,12 @@ class ArtemisDataCollector:
         if not self.monitored_queue:
             raise ValueError("No queues to monitor")
 
+        if getattr(self.config, "adaptive_interval", False) and not self.has_sample_interval_column():
+            raise ValueError(
+                f"--adaptive_interval requires the sample_interval column in {MESSAGE_COUNT_TABLE}, "
+                f"add it with: ALTER TABLE {MESSAGE_COUNT_TABLE} ADD COLUMN sample_interval integer"
+            )
+
         logger.info(f"Monitoring queues: {' '.join(self.monitored_queue.keys())}")
 
     @property
@@ -93,10 +433,58 @@ class ArtemisDataCollector:
     def run(self):
         """Main loop to collect data and add to database"""
         while True:
+            if getattr(self.config, "partition_interval", None):
+                self.maintain_partitions()
             data = self.collect_data()
             if data is not None:
-                self.add_to_database(data)
-            time.sleep(self.config.interval)
+                if self.history is not None:
+                    self.add_to_history(data)
+                if self.config.adaptive_interval:
+                    # record the interval that led up to this sample
+                    self.add_to_database(data, interval=self.current_interval)
+                else:
+                    self.add_to_database(data)
+            time.sleep(self.next_interval(data))
+
+    @property
+    def current_interval(self):
+        """The interval (seconds) currently used between samples"""
+        if self._interval is None:
+            self._interval = self.config.min_interval if self.config.adaptive_interval else self.config.interval
+        return self._interval
+
+    def next_interval(self, data):
+        """Returns the interval to wait before the next sample.
+
+        With a fixed interval this is always ``interval``. In adaptive mode the interval drops to ``min_interval``
+        while any monitored queue is above ``depth_threshold`` or changed at a rate of at least ``change_threshold``
+        messages per minute since the previous sample, and otherwise grows by ADAPTIVE_BACKOFF_FACTOR up to
+        ``max_interval``."""
+        if not self.config.adaptive_interval:
+            return self.config.interval
+
+        if data is None:
+            # no new information, keep the current interval
+            return self.current_interval
+
+        # the change is measured over the interval that led up to this sample, so that a slow drift does not count
+        # as activity only because it accumulated over a long interval
+        minutes = self.current_interval / 60
+        active = False
+        for queue_id, message_count in data:
+            previous = self._last_counts.get(queue_id)
+            if message_count >= self.config.depth_threshold or (
+                previous is not None and abs(message_count - previous) / minutes >= self.config.change_threshold
+            ):
+                active = True
+            self._last_counts[queue_id] = message_count
+
+        if active:
+            self._interval = self.config.min_interval
+        else:
+            self._interval = min(self.current_interval * ADAPTIVE_BACKOFF_FACTOR, self.config.max_interval)
+        logger.debug("Next sample in %s seconds", self._interval)
+        return self._interval
 
     def request_activemq(self, query):
         """Make a request to ActiveMQ Artemis Jolokia API with failover support"""
@@ -109,11 +497,11 @@ class ArtemisDataCollector:
                     if json_response["status"] == 200:
                         return json_response["value"]
                     else:
-                        logger.error(f"Primary broker error: {json_response}")
+                        logger.error("Primary broker error: %s", json_response)
                 except (ValueError, requests.exceptions.JSONDecodeError):
                     logger.exception("Primary broker JSON decode error (truncated payload): %s", str(response.text)[:512])
             else:
-                logger.error(f"Primary broker HTTP error {response.status_code}: {str(response.text)[:512]}")
+                logger.error("Primary broker HTTP error %s: %s", response.status_code, str(response.text)[:512])
         except requests.exceptions.RequestException:
             logger.exception("Primary broker connection error")
 
@@ -129,11 +517,11 @@ class ArtemisDataCollector:
                             logger.info("Successfully connected to failover broker")
                             return json_response["value"]
                         else:
-                            logger.error(f"Failover broker error: {json_response}")
+                            logger.error("Failover broker error: %s", json_response)
                     except (ValueError, requests.exceptions.JSONDecodeError):
                         logger.exception("Failover broker JSON decode error (truncated payload): %s", str(response.text)[:512])
                 else:
-                    logger.error(f"Failover broker HTTP error {response.status_code}: {str(response.text)[:512]}")
+                    logger.error("Failover broker HTTP error %s: %s", response.status_code, str(response.text)[:512])
             except requests.exceptions.RequestException:
                 logger.exception("Failover broker connection error")
         else:
@@ -143,43 +531,110 @@ class ArtemisDataCollector:
 
     def get_activemq_queues(self):
         """Returns a list of queues from the Artemis"""
+        if self._management is not None:
+            return self._management.get_address_names()
         return self.request_activemq("/AddressNames")
 
-    def collect_data(self):
+    def get_activemq_message_counts(self):
+        """Returns a map of address to message count from the Artemis, or None on failure"""
+        if self._management is not None:
+            return self._management.get_message_counts(self.monitored_queue.keys())
+
         # get all queue lengths in one call
         values = self.request_activemq(",address=%22*%22,component=addresses/MessageCount,Address")
         if values is None:
             return None
+        return {counts["Address"]: counts["MessageCount"] for counts in values.values()}
+
+    def collect_data(self):
+        message_counts = self.get_activemq_message_counts()
+        if message_counts is None:
+            return None
 
         queue_message_counts = []
 
-        for counts in values.values():
-            if counts["Address"] in self.monitored_queue:
-                queue_message_counts.append(
-                    (
-                        self.monitored_queue[counts["Address"]],
-                        counts["MessageCount"],
-                    )
-                )
+        for address, message_count in message_counts.items():
+            if address in self.monitored_queue:
+                queue_message_counts.append((self.monitored_queue[address], message_count))
 
         if queue_message_counts:
             logger.info(f"Successfully collected data for {len(queue_message_counts)} queues")
         return queue_message_counts
 
-    def add_to_database(self, data):
+    def add_to_database(self, data, interval=None):
+        """Insert the batch of (queue_id, message_count) into the database.
+
+        If ``interval`` is given it is stored in the sample_interval column of every row of the batch. With
+        ``update_latest`` the report_statusqueue_latest table is updated and with ``notify_channel`` a notification
+        of the batch is sent, both in the same transaction."""
         try:
             with self.conn.cursor() as cur:
-                cur.executemany(
-                    "INSERT INTO report_statusqueuemessagecount (queue_id, message_count, created_on) VALUES(%s,%s, now())",  # noqa: E501
-                    data,
-                )
+                if interval is None:
+                    cur.executemany(
+                        "INSERT INTO report_statusqueuemessagecount (queue_id, message_count, created_on) VALUES(%s,%s, now())",  # noqa: E501
+                        data,
+                    )
+                else:
+                    cur.executemany(
+                        "INSERT INTO report_statusqueuemessagecount (queue_id, message_count, sample_interval, created_on) VALUES(%s,%s,%s, now())",  # noqa: E501
+                        [(queue_id, message_count, interval) for queue_id, message_count in data],
+                    )
+                if getattr(self.config, "update_latest", False) and data:
+                    # one statement for the whole batch
+                    cur.execute(
+                        "INSERT INTO report_statusqueue_latest (queue_id, message_count, created_on) "
+                        "SELECT queue_id, message_count, now() FROM unnest(%s::integer[], %s::integer[]) "
+                        "AS batch(queue_id, message_count) "
+                        "ON CONFLICT (queue_id) DO UPDATE "
+                        "SET message_count = EXCLUDED.message_count, created_on = EXCLUDED.created_on",
+                        ([queue_id for queue_id, _ in data], [message_count for _, message_count in data]),
+                    )
+                notify_channel = getattr(self.config, "notify_channel", None)
+                if notify_channel and data:
+                    # delivered to listeners only when the transaction commits
+                    cur.execute("SELECT pg_notify(%s, %s)", (notify_channel, notify_payload(data, interval)))
             self.conn.commit()
         except psycopg.errors.DatabaseError as e:
             # We want to catch any database errors and log them but continue running
             logger.error(e)
+            self.conn.rollback()
         else:
             logger.info("Successfully added records to the database")
 
+    def add_to_history(self, data):
+        """Add the batch of (queue_id, message_count) to the in-memory history, keyed by queue name"""
+        queue_names = {queue_id: name for name, queue_id in self.monitored_queue.items()}
+        self.history.add(time.time(), {queue_names[queue_id]: message_count for queue_id, message_count in data})
+
+    def maintain_partitions(self):
+        """Creates upcoming and expires old partitions, at most once every PARTITION_MAINTENANCE_PERIOD"""
+        if time.monotonic() < self._next_partition_maintenance:
+            return
+        try:
+            maintain_partitions(
+                self.conn,
+                self.config.partition_interval,
+                premake=self.config.partition_premake,
+                retention=self.config.partition_retention,
+                detach=self.config.partition_detach,
+            )
+        except psycopg.errors.DatabaseError as e:
+            # keep collecting, the maintenance will be retried next cycle
+            logger.error(e)
+            self.conn.rollback()
+        else:
+            self._next_partition_maintenance = time.monotonic() + PARTITION_MAINTENANCE_PERIOD
+
+    def has_sample_interval_column(self):
+        """Returns whether the message count table has the sample_interval column used in adaptive mode"""
+        with self.conn.cursor() as cur:
+            cur.execute(
+                "SELECT 1 FROM information_schema.columns "
+                "WHERE table_schema = current_schema() AND table_name = %s AND column_name = 'sample_interval'",
+                (MESSAGE_COUNT_TABLE,),
+            )
+            return cur.fetchone() is not None
+
     def get_database_statusqueues(self):
         """Returns maps of status queues to id from the database"""
         with self.conn.cursor() as cur:
@@ -203,6 +658,11 @@ def parse_args(args):
         action="store_true",
         help="Initialize the database tables and exit. Will fail if tables already exist",
     )
+    parser.add_argument(
+        "--maintain_partitions",
+        action="store_true",
+        help="Create upcoming and remove expired partitions of the message count table and exit",
+    )
     parser.add_argument(
         "--artemis_url", 
         default=environ.get("ARTEMIS_URL", "http://localhost:8161"), 
@@ -213,6 +673,22 @@ def parse_args(args):
         default=environ.get("ARTEMIS_FAILOVER_URL"),
         help="URL of the failover Artemis instance (optional)",
     )
+    parser.add_argument(
+        "--artemis_transport",
+        choices=ARTEMIS_TRANSPORTS,
+        default=environ.get("ARTEMIS_TRANSPORT", "jolokia"),
+        help="How to read the queue information, Jolokia HTTP API or management messages over STOMP",
+    )
+    parser.add_argument(
+        "--artemis_stomp_endpoint",
+        default=environ.get("ARTEMIS_STOMP_ENDPOINT", "localhost:61613"),
+        help="host:port of the primary Artemis STOMP acceptor, used with the stomp transport",
+    )
+    parser.add_argument(
+        "--artemis_stomp_failover_endpoint",
+        default=environ.get("ARTEMIS_STOMP_FAILOVER_ENDPOINT"),
+        help="host:port of the failover Artemis STOMP acceptor (optional), used with the stomp transport",
+    )
     parser.add_argument(
         "--artemis_user", default=environ.get("ARTEMIS_USER", "artemis"), help="User of the Artemis instance"
     )
@@ -250,17 +726,121 @@ def parse_args(args):
     parser.add_argument(
         "--interval", type=int, default=environ.get("INTERVAL", 600), help="Interval to collect data (seconds)"
     )
+    parser.add_argument(
+        "--update_latest",
+        action="store_true",
+        default=environ.get("UPDATE_LATEST", "false").lower() in ("1", "true", "yes"),
+        help="Also keep the latest message count of every queue in the report_statusqueue_latest table",
+    )
+    parser.add_argument(
+        "--notify_channel",
+        default=environ.get("NOTIFY_CHANNEL"),
+        help="PostgreSQL channel to NOTIFY with every batch of message counts. If not specified, no notifications",
+    )
+    parser.add_argument(
+        "--history_port",
+        type=int,
+        default=environ.get("HISTORY_PORT"),
+        help="Port of the HTTP/JSON API serving the recent history from memory. If not specified, no history is kept",
+    )
+    parser.add_argument(
+        "--history_host",
+        default=environ.get("HISTORY_HOST", "127.0.0.1"),
+        help="Address the history HTTP/JSON API listens on",
+    )
+    parser.add_argument(
+        "--history_max_age",
+        type=int,
+        default=environ.get("HISTORY_MAX_AGE", 3600),
+        help="How long samples are kept in the in-memory history (seconds)",
+    )
+    parser.add_argument(
+        "--adaptive_interval",
+        action="store_true",
+        default=environ.get("ADAPTIVE_INTERVAL", "false").lower() in ("1", "true", "yes"),
+        help="Adapt the interval between min_interval and max_interval to the queue activity "
+        "instead of using a fixed interval",
+    )
+    parser.add_argument(
+        "--min_interval",
+        type=int,
+        default=environ.get("MIN_INTERVAL", 30),
+        help="Shortest interval to collect data in adaptive mode (seconds)",
+    )
+    parser.add_argument(
+        "--max_interval",
+        type=int,
+        default=environ.get("MAX_INTERVAL", 600),
+        help="Longest interval to collect data in adaptive mode (seconds)",
+    )
+    parser.add_argument(
+        "--depth_threshold",
+        type=int,
+        default=environ.get("DEPTH_THRESHOLD", 100),
+        help="In adaptive mode, sample at min_interval while any queue has at least this many messages",
+    )
+    parser.add_argument(
+        "--change_threshold",
+        type=float,
+        default=environ.get("CHANGE_THRESHOLD", 10),
+        help="In adaptive mode, sample at min_interval while any queue changes by at least this many messages "
+        "per minute",
+    )
     parser.add_argument(
         "--log_level",
         default=environ.get("LOG_LEVEL", "INFO"),
         help="Log level (DEBUG, INFO, WARNING, ERROR, CRITICAL)",
     )
     parser.add_argument("--log_file", default=environ.get("LOG_FILE"), help="Log file. If not specified, log to stdout")
+    parser.add_argument(
+        "--log_format",
+        choices=LOG_FORMATS,
+        default=environ.get("LOG_FORMAT", "text"),
+        help="Write the log as plain text or as one JSON object per line",
+    )
+    parser.add_argument(
+        "--log_rate_limit_period",
+        type=int,
+        default=environ.get("LOG_RATE_LIMIT_PERIOD", 300),
+        help="Period (seconds) over which repeated warnings and errors are rate limited and summarized. 0 to disable",
+    )
+    parser.add_argument(
+        "--log_rate_limit_burst",
+        type=int,
+        default=environ.get("LOG_RATE_LIMIT_BURST", 5),
+        help="Number of identical warnings or errors logged per period before they are suppressed",
+    )
     parser.add_argument(
         "--http_timeout",
         type=float,
         default=float(environ.get("HTTP_TIMEOUT", "10")),
-        help="HTTP timeout in seconds for broker requests",
+        help="Timeout in seconds for broker requests",
+    )
+    parser.add_argument(
+        "--partition_interval",
+        choices=PARTITION_INTERVALS,
+        default=environ.get("PARTITION_INTERVAL"),
+        help="Range partition the message count table by created_on per month or week. "
+        "If not specified, the table is not partitioned",
+    )
+    parser.add_argument(
+        "--partition_premake",
+        type=int,
+        default=environ.get("PARTITION_PREMAKE", 3),
+        help="Number of future partitions to create ahead of time",
+    )
+    parser.add_argument(
+        "--partition_retention",
+        type=int,
+        default=environ.get("PARTITION_RETENTION"),
+        help="Number of past partitions to keep, older ones are removed. 0 keeps only the current partition. "
+        "If not specified, keep all",
+    )
+    parser.add_argument(
+        "--partition_detach",
+        action="store_true",
+        default=environ.get("PARTITION_DETACH", "false").lower() in ("1", "true", "yes"),
+        help="Detach expired partitions instead of dropping them",
     )
     return parser.parse_args(args)
 
@@ -268,17 +848,61 @@ def parse_args(args):
 def main():
     config = parse_args(sys.argv[1:])
 
-    # setup logging
-    logging.basicConfig(
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s", level=config.log_level, filename=config.log_file
+    # setup logging, the records are written out by a background thread
+    async_logging = setup_logging(
+        level=config.log_level,
+        filename=config.log_file,
+        log_format=config.log_format,
+        rate_limit_period=config.log_rate_limit_period,
+        rate_limit_burst=config.log_rate_limit_burst,
     )
+    try:
+        return _main(config)
+    finally:
+        async_logging.stop()
+
+
+def _main(config):
+    if config.partition_premake < 0 or (config.partition_retention is not None and config.partition_retention < 0):
+        logger.error("--partition_premake and --partition_retention must not be negative")
+        return 1
 
     if config.initialize_db:
         initialize_database_tables(config)
         return 0
 
+    if config.maintain_partitions:
+        if not config.partition_interval:
+            logger.error("--maintain_partitions requires --partition_interval")
+            return 1
+        with psycopg.connect(
+            dbname=config.database_name,
+            host=config.database_hostname,
+            port=config.database_port,
+            user=config.database_user,
+            password=config.database_password,
+        ) as conn:
+            maintain_partitions(
+                conn,
+                config.partition_interval,
+                premake=config.partition_premake,
+                retention=config.partition_retention,
+                detach=config.partition_detach,
+            )
+        return 0
+
+    if config.adaptive_interval and not 0 < config.min_interval <= config.max_interval:
+        logger.error("--min_interval must be positive and not larger than --max_interval")
+        return 1
+
     try:
-        adc = ArtemisDataCollector(config)
+        history = None
+        if config.history_port is not None:
+            history = HistoryStore(max_age=config.history_max_age)
+            # raises OSError if the port is already in use
+            start_history_server(history, config.history_host, config.history_port)
+
+        adc = ArtemisDataCollector(config, history=history)
         adc.run()
     except KeyboardInterrupt:
         logger.info("Exiting")
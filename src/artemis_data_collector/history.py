@@ -0,0 +1,148 @@
+import json
+import logging
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+logger = logging.getLogger("AtremisDataCollector.history")
+
+AGGREGATIONS = {
+    "last": lambda counts: counts[-1],
+    "max": max,
+    "mean": lambda counts: sum(counts) / len(counts),
+}
+
+
+class HistoryStore:
+    """Recent message counts per queue kept in memory, as compact arrays of timestamps (unix seconds) and counts.
+
+    Samples older than ``max_age`` seconds are never returned and are evicted when new samples are added."""
+
+    def __init__(self, max_age=3600):
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        # queue name -> (timestamps, counts)
+        self._series = {}
+
+    def add(self, timestamp, counts):
+        """Add the message counts of one sample, ``counts`` maps queue name to message count"""
+        cutoff = timestamp - self.max_age
+        with self._lock:
+            for queue, message_count in counts.items():
+                timestamps, values = self._series.setdefault(queue, (array("d"), array("q")))
+                timestamps.append(timestamp)
+                values.append(message_count)
+            for timestamps, values in self._series.values():
+                expired = bisect_left(timestamps, cutoff)
+                if expired:
+                    del timestamps[:expired]
+                    del values[:expired]
+
+    def queues(self):
+        with self._lock:
+            return sorted(self._series)
+
+    def query(self, queue, start=None, end=None, step=None, agg="last"):
+        """Returns the list of [timestamp, count] of ``queue`` between ``start`` and ``end`` (inclusive).
+
+        If ``step`` is given the samples are downsampled into buckets of ``step`` seconds, each reported at the
+        start of the bucket with the ``agg`` (last, max or mean) of its counts. Samples older than ``max_age``
+        seconds are left out even if no sample was added since. Raises KeyError for an unknown queue."""
+        aggregate = AGGREGATIONS[agg]
+        cutoff = time.time() - self.max_age
+        start = cutoff if start is None else max(start, cutoff)
+        with self._lock:
+            timestamps, values = self._series[queue]
+            first = bisect_left(timestamps, start)
+            last = len(timestamps) if end is None else bisect_right(timestamps, end)
+            timestamps = timestamps[first:last]
+            values = values[first:last]
+
+        if not step:
+            return [[t, v] for t, v in zip(timestamps, values)]
+
+        points = []
+        bucket = None
+        bucket_values = []
+        for t, v in zip(timestamps, values):
+            t_bucket = t - t % step
+            if t_bucket != bucket and bucket_values:
+                points.append([bucket, aggregate(bucket_values)])
+                bucket_values = []
+            bucket = t_bucket
+            bucket_values.append(v)
+        if bucket_values:
+            points.append([bucket, aggregate(bucket_values)])
+        return points
+
+
+class HistoryRequestHandler(BaseHTTPRequestHandler):
+    """JSON API of the HistoryStore
+
+    GET /queues
+        {"queues": [names]}
+    GET /history?queue=NAME&start=T&end=T&last=SECONDS&step=SECONDS&agg=last|max|mean
+        {"queue": name, "points": [[timestamp, count], ...]}, every parameter except queue is optional and
+        ``last`` selects the most recent seconds instead of ``start``, passing both is rejected
+    """
+
+    store = None
+
+    def do_GET(self):  # noqa: N802
+        url = urlparse(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+
+        if url.path == "/queues":
+            self._reply(HTTPStatus.OK, {"queues": self.store.queues()})
+        elif url.path == "/history":
+            try:
+                start = float(params["start"]) if "start" in params else None
+                if "last" in params:
+                    if start is not None:
+                        raise ValueError("start and last are mutually exclusive")
+                    start = time.time() - float(params["last"])
+                end = float(params["end"]) if "end" in params else None
+                step = float(params["step"]) if "step" in params else None
+                agg = params.get("agg", "last")
+                if agg not in AGGREGATIONS:
+                    raise ValueError(f"agg must be one of {', '.join(AGGREGATIONS)}")
+                if step is not None and step <= 0:
+                    raise ValueError("step must be positive")
+                queue = params["queue"]
+            except (KeyError, ValueError) as e:
+                self._reply(HTTPStatus.BAD_REQUEST, {"error": f"Invalid parameters: {e}"})
+                return
+
+            try:
+                points = self.store.query(queue, start=start, end=end, step=step, agg=agg)
+            except KeyError:
+                self._reply(HTTPStatus.NOT_FOUND, {"error": f"Unknown queue {queue}"})
+                return
+            self._reply(HTTPStatus.OK, {"queue": queue, "points": points})
+        else:
+            self._reply(HTTPStatus.NOT_FOUND, {"error": f"Unknown path {url.path}"})
+
+    def _reply(self, status, body):
+        data = json.dumps(body, separators=(",", ":")).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):  # noqa: A002
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+def start_history_server(store, host, port):
+    """Serve the ``store`` on host:port from a background daemon thread, returns the server"""
+    handler = type("BoundHistoryRequestHandler", (HistoryRequestHandler,), {"store": store})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="HistoryServer", daemon=True).start()
+    logger.info("Serving recent history on http://%s:%s", *server.server_address[:2])
+    return server
@@ -0,0 +1,91 @@
+import json
+import logging
+import threading
+
+import psycopg
+from psycopg import sql
+
+logger = logging.getLogger("AtremisDataCollector.listener")
+
+
+class QueueCountListener:
+    """Receives the notifications sent by the collector with ``--notify_channel`` and passes them on to all
+    subscribed callbacks.
+
+    Each callback is called with ``(counts, interval)`` where counts maps queue_id to message count, or is None if
+    the batch was too large for a notification and has to be read from the database. The interval is only set when
+    the collector runs with an adaptive interval.
+
+    ``conninfo`` are the keyword arguments given to ``psycopg.connect``, e.g.
+
+        listener = QueueCountListener("queue_counts", dbname="workflow", host="localhost", user="workflow")
+        listener.subscribe(lambda counts, interval: print(counts))
+        listener.start()
+    """
+
+    def __init__(self, channel, reconnect_delay=5.0, **conninfo):
+        self.channel = channel
+        self.reconnect_delay = reconnect_delay
+        self.conninfo = conninfo
+        self._callbacks = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def subscribe(self, callback):
+        """Add a callback, returns it so this can be used as a decorator"""
+        with self._lock:
+            self._callbacks.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            self._callbacks.remove(callback)
+
+    def dispatch(self, payload):
+        """Decode a notification payload and call every subscribed callback with it"""
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            logger.error("Invalid notification payload: %s", payload[:512])
+            return
+        counts = message.get("counts")
+        if counts is not None:
+            counts = {int(queue_id): message_count for queue_id, message_count in counts.items()}
+
+        with self._lock:
+            callbacks = list(self._callbacks)
+        for callback in callbacks:
+            try:
+                callback(counts, message.get("interval"))
+            except Exception:
+                # one failing consumer must not stop the others
+                logger.exception("Notification callback %r failed", callback)
+
+    def run(self):
+        """LISTEN on the channel and dispatch notifications until stop() is called, reconnecting on failures"""
+        while not self._stop.is_set():
+            try:
+                with psycopg.connect(autocommit=True, **self.conninfo) as conn:
+                    conn.execute(sql.SQL("LISTEN {}").format(sql.Identifier(self.channel)))
+                    logger.info("Listening for notifications on %s", self.channel)
+                    while not self._stop.is_set():
+                        # wake up regularly to check for stop()
+                        for notify in conn.notifies(timeout=1.0):
+                            self.dispatch(notify.payload)
+            except psycopg.OperationalError:
+                logger.exception("Lost database connection, reconnecting in %s seconds", self.reconnect_delay)
+                self._stop.wait(self.reconnect_delay)
+
+    def start(self):
+        """Run the listener in a background daemon thread"""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name="QueueCountListener", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
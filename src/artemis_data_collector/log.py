@@ -0,0 +1,164 @@
+import json
+import logging
+import queue
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_FORMATS = ("text", "json")
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+
+def format_period(seconds):
+    """Returns a short human readable period, e.g. 300 -> 5m"""
+    if seconds % 3600 == 0:
+        return f"{seconds // 3600:g}h"
+    if seconds % 60 == 0:
+        return f"{seconds // 60:g}m"
+    return f"{seconds:g}s"
+
+
+class RateLimitFilter(logging.Filter):
+    """Lets through at most ``burst`` records with the same logger, level and message template per ``period`` seconds.
+
+    Only records at ``level`` or above are limited. Once a period in which records were suppressed is over,
+    summaries() returns a record reporting how often it occurred, e.g. "Primary broker connection error (x340 in last
+    5m)", with the number of suppressed records in its ``suppressed`` attribute."""
+
+    def __init__(self, period=300, burst=5, level=logging.WARNING):
+        super().__init__()
+        self.period = period
+        self.burst = burst
+        self.level = level
+        self._lock = threading.Lock()
+        # key -> [window start, records in window, suppressed records, last suppressed record]
+        self._windows = {}
+        # windows which ended with suppressed records and are waiting to be summarized
+        self._ended = []
+
+    def filter(self, record):
+        if record.levelno < self.level:
+            return True
+
+        key = (record.name, record.levelno, str(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.period:
+                if window is not None and window[2]:
+                    self._ended.append(window)
+                window = [now, 0, 0, None]
+                self._windows[key] = window
+            window[1] += 1
+            if window[1] > self.burst:
+                window[2] += 1
+                window[3] = record
+                return False
+        return True
+
+    def summaries(self, ended_only=True):
+        """Returns summary records for the periods which are over and had suppressed records, or with
+        ``ended_only=False`` also for the current periods, which is used when logging shuts down"""
+        now = time.monotonic()
+        with self._lock:
+            pending, self._ended = self._ended, []
+            for key, window in list(self._windows.items()):
+                if not ended_only or now - window[0] >= self.period:
+                    del self._windows[key]
+                    if window[2]:
+                        pending.append(window)
+
+        records = []
+        for _, occurrences, suppressed, record in pending:
+            summary = logging.makeLogRecord(record.__dict__)
+            # the traceback was already reported with the records that were let through
+            summary.exc_info = None
+            summary.exc_text = None
+            self._summarize(summary, occurrences, suppressed)
+            records.append(summary)
+        return records
+
+    def _summarize(self, record, occurrences, suppressed):
+        record.msg = f"{record.msg} (x{occurrences} in last {format_period(self.period)})"
+        record.suppressed = suppressed
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats every record as one JSON object per line"""
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "suppressed", None):
+            entry["suppressed"] = record.suppressed
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry)
+
+
+class _ThreadQueueHandler(QueueHandler):
+    def prepare(self, record):
+        # The records stay in this process, so leave the formatting (including tracebacks) to the listener thread
+        # instead of doing it on the caller's thread
+        return record
+
+
+class AsyncLogging(QueueListener):
+    """QueueListener which also writes the summaries of suppressed records, checking every ``flush_interval``
+    seconds for rate limit periods that are over, and writes the remaining ones when stopped"""
+
+    def __init__(self, log_queue, handler, rate_limit=None, flush_interval=1.0):
+        super().__init__(log_queue, handler, respect_handler_level=True)
+        self.rate_limit = rate_limit
+        self.flush_interval = flush_interval
+        self._stop_flush = threading.Event()
+        self._flush_thread = None
+
+    def start(self):
+        super().start()
+        if self.rate_limit is not None:
+            self._stop_flush.clear()
+            self._flush_thread = threading.Thread(target=self._flush, name="AsyncLoggingFlush", daemon=True)
+            self._flush_thread.start()
+
+    def _flush(self):
+        while not self._stop_flush.wait(self.flush_interval):
+            for record in self.rate_limit.summaries():
+                self.handle(record)
+
+    def stop(self):
+        super().stop()
+        if self.rate_limit is not None:
+            self._stop_flush.set()
+            self._flush_thread.join()
+            for record in self.rate_limit.summaries(ended_only=False):
+                self.handle(record)
+
+
+def setup_logging(level="INFO", filename=None, log_format="text", rate_limit_period=300, rate_limit_burst=5):
+    """Configure the root logger to hand records to a background thread which writes them to ``filename`` (or
+    stderr), optionally as JSON. Warnings and errors are rate limited per message unless ``rate_limit_period``
+    is 0.
+
+    Returns the started AsyncLogging, which must be stopped to flush the remaining records."""
+    handler = logging.FileHandler(filename) if filename else logging.StreamHandler()
+    handler.setFormatter(JsonFormatter() if log_format == "json" else logging.Formatter(TEXT_FORMAT))
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = _ThreadQueueHandler(log_queue)
+    rate_limit = None
+    if rate_limit_period:
+        rate_limit = RateLimitFilter(period=rate_limit_period, burst=rate_limit_burst)
+        queue_handler.addFilter(rate_limit)
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(queue_handler)
+
+    listener = AsyncLogging(log_queue, handler, rate_limit)
+    listener.start()
+    return listener
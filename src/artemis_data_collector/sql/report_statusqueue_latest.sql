@@ -0,0 +1,47 @@
+--
+-- Latest message count of every status queue, maintained by the collector
+-- alongside report_statusqueuemessagecount
+--
+
+SET statement_timeout = 0;
+SET lock_timeout = 0;
+SET idle_in_transaction_session_timeout = 0;
+SET client_encoding = 'UTF8';
+SET standard_conforming_strings = on;
+SELECT pg_catalog.set_config('search_path', '', false);
+SET check_function_bodies = false;
+SET xmloption = content;
+SET client_min_messages = warning;
+SET row_security = off;
+
+SET default_tablespace = '';
+
+SET default_table_access_method = heap;
+
+--
+-- Name: report_statusqueue_latest; Type: TABLE; Schema: public; Owner: workflow
+--
+
+CREATE TABLE public.report_statusqueue_latest (
+    queue_id integer NOT NULL,
+    message_count integer NOT NULL,
+    created_on timestamp with time zone NOT NULL
+);
+
+
+ALTER TABLE public.report_statusqueue_latest OWNER TO workflow;
+
+--
+-- Name: report_statusqueue_latest report_statusqueue_latest_pkey; Type: CONSTRAINT; Schema: public; Owner: workflow
+--
+
+ALTER TABLE ONLY public.report_statusqueue_latest
+    ADD CONSTRAINT report_statusqueue_latest_pkey PRIMARY KEY (queue_id);
+
+
+--
+-- Name: report_statusqueue_latest report_statusqueue_latest_queue_id_fk_report_st; Type: FK CONSTRAINT; Schema: public; Owner: workflow
+--
+
+ALTER TABLE ONLY public.report_statusqueue_latest
+    ADD CONSTRAINT report_statusqueue_latest_queue_id_fk_report_st FOREIGN KEY (queue_id) REFERENCES public.report_statusqueue(id) DEFERRABLE INITIALLY DEFERRED;
@@ -28,6 +28,7 @@ CREATE TABLE public.report_statusqueuemessagecount (
     id integer NOT NULL,
     queue_id integer NOT NULL,
     message_count integer NOT NULL,
+    sample_interval integer,
     created_on timestamp with time zone NOT NULL
 );
 
@@ -0,0 +1,34 @@
+from unittest.mock import Mock, patch
+
+import pytest
+
+
+class MockBackend:
+    """The mocked database connection and Jolokia session of an ArtemisDataCollector"""
+
+    def __init__(self, mock_connect, mock_session_class):
+        self.connect = mock_connect
+        self.conn = mock_connect.return_value
+        self.conn.closed = False
+        self.cursor = self.conn.cursor.return_value.__enter__.return_value
+        self.session = mock_session_class.return_value
+        self.set_queues({"TEST_QUEUE": 1})
+
+    def set_queues(self, queues):
+        """Make the queues, a map of name to queue_id, exist both in the database and in the broker"""
+        self.cursor.fetchall.return_value = [(queue_id, name) for name, queue_id in queues.items()]
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {"status": 200, "value": list(queues)}
+        self.session.get.return_value = mock_response
+
+
+@pytest.fixture
+def mock_backend():
+    """Patches psycopg.connect and requests.Session so that an ArtemisDataCollector can be created without a
+    database or broker, monitoring TEST_QUEUE with queue_id 1 unless changed with set_queues"""
+    with (
+        patch("artemis_data_collector.artemis_data_collector.psycopg.connect") as mock_connect,
+        patch("artemis_data_collector.artemis_data_collector.requests.Session") as mock_session_class,
+    ):
+        yield MockBackend(mock_connect, mock_session_class)
@@ -23,7 +23,9 @@ Config = namedtuple(
         "database_password",
         "database_name",
         "http_timeout",
+        "update_latest",
     ],
+    defaults=(False,),
 )
 
 config = Config(
@@ -135,6 +137,39 @@ class TestArtemisDataCollector(unittest.TestCase):
         assert result[1] == self.queue_id
         assert result[2] == 42
 
+    def test_add_to_database_update_latest(self):
+        with psycopg.connect(
+            dbname=config.database_name,
+            host=config.database_hostname,
+            port=config.database_port,
+            user=config.database_user,
+            password=config.database_password,
+        ) as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT id FROM report_statusqueue WHERE name = 'TEST_QUEUE2'")
+                queue_id2 = cur.fetchone()[0]
+
+        adc = ArtemisDataCollector(config._replace(update_latest=True))
+        adc.add_to_database([(self.queue_id, 3), (queue_id2, 1)])
+        adc.add_to_database([(self.queue_id, 5), (queue_id2, 0)])
+
+        with psycopg.connect(
+            dbname=config.database_name,
+            host=config.database_hostname,
+            port=config.database_port,
+            user=config.database_user,
+            password=config.database_password,
+        ) as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "SELECT queue_id, message_count FROM report_statusqueue_latest WHERE queue_id IN (%s, %s)",
+                    (self.queue_id, queue_id2),
+                )
+                rows = cur.fetchall()
+
+        # one row per queue holding the latest count
+        assert sorted(rows) == sorted([(self.queue_id, 5), (queue_id2, 0)])
+
     def test_no_valid_queues(self):
         config_no_valid_queues = Config(
             "artemis",
@@ -0,0 +1,134 @@
+"""
+Unit tests for the adaptive sampling interval of the Artemis Data Collector.
+"""
+
+import sys
+import unittest
+from unittest.mock import MagicMock, Mock, patch
+
+import pytest
+
+from artemis_data_collector.artemis_data_collector import ArtemisDataCollector, main, parse_args
+
+
+class TestAdaptiveInterval(unittest.TestCase):
+    def setUp(self):
+        self.config = Mock()
+        self.config.artemis_url = "http://primary:8161"
+        self.config.artemis_failover_url = None
+        self.config.artemis_broker_name = "0.0.0.0"
+        self.config.queue_list = ["TEST_QUEUE"]
+        self.config.interval = 600
+        self.config.adaptive_interval = True
+        self.config.min_interval = 10
+        self.config.max_interval = 100
+        self.config.depth_threshold = 50
+        self.config.change_threshold = 5
+        self.config.partition_interval = None
+
+    @pytest.fixture(autouse=True)
+    def _backend(self, mock_backend):
+        self.mock_cursor = mock_backend.cursor
+
+    def test_fixed_interval(self):
+        self.config.adaptive_interval = False
+        adc = ArtemisDataCollector(self.config)
+        self.assertEqual(adc.next_interval([(1, 1000)]), 600)
+        self.assertEqual(adc.next_interval(None), 600)
+
+    def test_backoff_when_quiet(self):
+        adc = ArtemisDataCollector(self.config)
+        self.assertEqual(adc.current_interval, 10)
+        self.assertEqual(adc.next_interval([(1, 0)]), 20)
+        self.assertEqual(adc.next_interval([(1, 1)]), 40)
+        self.assertEqual(adc.next_interval([(1, 0)]), 80)
+        self.assertEqual(adc.next_interval([(1, 0)]), 100)
+        self.assertEqual(adc.next_interval([(1, 0)]), 100)
+        # failed collection keeps the current interval
+        self.assertEqual(adc.next_interval(None), 100)
+
+    def test_fast_when_active(self):
+        adc = ArtemisDataCollector(self.config)
+        adc.next_interval([(1, 0)])
+        adc.next_interval([(1, 0)])
+        # changing quickly, 4 messages in 40 seconds is 6 per minute
+        self.assertEqual(adc.current_interval, 40)
+        self.assertEqual(adc.next_interval([(1, 4)]), 10)
+        self.assertEqual(adc.next_interval([(1, 4)]), 20)
+        # above the depth threshold, even if flat
+        self.assertEqual(adc.next_interval([(1, 50)]), 10)
+        self.assertEqual(adc.next_interval([(1, 50)]), 10)
+
+    def test_slow_drift_is_quiet(self):
+        adc = ArtemisDataCollector(self.config)
+        for _ in range(4):
+            adc.next_interval([(1, 0)])
+        self.assertEqual(adc.current_interval, 100)
+        # 5 messages in 100 seconds is 3 per minute, below the threshold of 5 per minute
+        self.assertEqual(adc.next_interval([(1, 5)]), 100)
+        self.assertEqual(adc.next_interval([(1, 10)]), 100)
+        # the same change over 20 seconds is 15 per minute
+        adc = ArtemisDataCollector(self.config)
+        self.assertEqual(adc.next_interval([(1, 0)]), 20)
+        self.assertEqual(adc.next_interval([(1, 5)]), 10)
+
+    def test_requires_sample_interval_column(self):
+        self.mock_cursor.fetchone.return_value = None
+        with self.assertRaisesRegex(ValueError, "sample_interval"):
+            ArtemisDataCollector(self.config)
+
+        # not needed with a fixed interval
+        self.config.adaptive_interval = False
+        ArtemisDataCollector(self.config)
+
+    def test_add_to_database_records_interval(self):
+        adc = ArtemisDataCollector(self.config)
+        adc.add_to_database([(1, 3)], interval=20)
+
+        query, rows = self.mock_cursor.executemany.call_args.args
+        self.assertIn("sample_interval", query)
+        self.assertEqual(rows, [(1, 3, 20)])
+
+    def test_run_records_current_interval(self):
+        adc = ArtemisDataCollector(self.config)
+        adc.collect_data = MagicMock(return_value=[(1, 0)])
+        adc.add_to_database = MagicMock()
+
+        with patch("artemis_data_collector.artemis_data_collector.time.sleep", side_effect=[None, KeyboardInterrupt]):
+            with self.assertRaises(KeyboardInterrupt):
+                adc.run()
+
+        self.assertEqual(
+            [c.kwargs["interval"] for c in adc.add_to_database.call_args_list],
+            [10, 20],
+        )
+
+
+@pytest.mark.parametrize("min_interval, max_interval", [("0", "600"), ("-5", "600"), ("700", "600")])
+def test_main_rejects_invalid_intervals(min_interval, max_interval):
+    argv = ["artemis_data_collector", "--adaptive_interval", "--min_interval", min_interval]
+    argv += ["--max_interval", max_interval]
+    with (
+        patch.object(sys, "argv", argv),
+        patch("artemis_data_collector.artemis_data_collector.setup_logging"),
+        patch("artemis_data_collector.artemis_data_collector.ArtemisDataCollector") as mock_collector,
+    ):
+        assert main() == 1
+    mock_collector.assert_not_called()
+
+
+def test_parse_args_adaptive():
+    args = parse_args([])
+    assert args.adaptive_interval is False
+    assert args.min_interval == 30
+    assert args.max_interval == 600
+    assert args.change_threshold == 10
+
+    args = parse_args(["--adaptive_interval", "--min_interval", "5", "--max_interval", "300"])
+    assert args.adaptive_interval is True
+    assert args.min_interval == 5
+    assert args.max_interval == 300
+
+
+if __name__ == "__main__":
+    unittest.main()
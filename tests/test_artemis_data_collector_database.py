@@ -0,0 +1,93 @@
+"""
+Unit tests for the database writes of the Artemis Data Collector.
+"""
+
+import json
+import unittest
+from unittest.mock import Mock
+
+import psycopg
+import pytest
+
+from artemis_data_collector.artemis_data_collector import ArtemisDataCollector, notify_payload, parse_args
+
+
+class TestAddToDatabase(unittest.TestCase):
+    def setUp(self):
+        self.config = Mock()
+        self.config.artemis_url = "http://primary:8161"
+        self.config.artemis_failover_url = None
+        self.config.queue_list = ["TEST_QUEUE", "TEST_QUEUE2"]
+        self.config.update_latest = True
+        self.config.notify_channel = None
+
+    @pytest.fixture(autouse=True)
+    def _backend(self, mock_backend):
+        mock_backend.set_queues({"TEST_QUEUE": 1, "TEST_QUEUE2": 2})
+        self.mock_conn = mock_backend.conn
+        self.mock_cursor = mock_backend.cursor
+
+    def test_update_latest(self):
+        adc = ArtemisDataCollector(self.config)
+        adc.add_to_database([(1, 3), (2, 0)])
+
+        self.mock_cursor.executemany.assert_called_once()
+        query, params = self.mock_cursor.execute.call_args.args
+        self.assertIn("report_statusqueue_latest", query)
+        self.assertIn("ON CONFLICT (queue_id)", query)
+        self.assertEqual(params, ([1, 2], [3, 0]))
+        # history and latest values are committed together
+        self.mock_conn.commit.assert_called_once()
+
+    def test_without_latest(self):
+        self.config.update_latest = False
+        adc = ArtemisDataCollector(self.config)
+        self.mock_cursor.execute.reset_mock()
+        adc.add_to_database([(1, 3), (2, 0)])
+
+        self.mock_cursor.executemany.assert_called_once()
+        self.mock_cursor.execute.assert_not_called()
+
+    def test_notify(self):
+        self.config.update_latest = False
+        self.config.notify_channel = "queue_counts"
+        adc = ArtemisDataCollector(self.config)
+        adc.add_to_database([(1, 3), (2, 0)], interval=30)
+
+        query, params = self.mock_cursor.execute.call_args.args
+        self.assertIn("pg_notify", query)
+        self.assertEqual(params[0], "queue_counts")
+        self.assertEqual(json.loads(params[1]), {"counts": {"1": 3, "2": 0}, "interval": 30})
+        self.mock_conn.commit.assert_called_once()
+
+    def test_database_error_rolls_back(self):
+        adc = ArtemisDataCollector(self.config)
+        self.mock_cursor.execute.side_effect = psycopg.errors.UndefinedTable("report_statusqueue_latest")
+
+        with self.assertLogs(level="ERROR"):
+            adc.add_to_database([(1, 3)])
+
+        self.mock_conn.commit.assert_not_called()
+        self.mock_conn.rollback.assert_called_once()
+
+
+def test_notify_payload():
+    assert notify_payload([(1, 3), (2, 0)]) == '{"counts":{"1":3,"2":0}}'
+
+    # too large for a notification
+    payload = json.loads(notify_payload([(i, 1000000) for i in range(1000)], 600))
+    assert payload == {"counts": None, "interval": 600}
+
+
+def test_parse_args_update_latest():
+    assert parse_args([]).update_latest is False
+    assert parse_args(["--update_latest"]).update_latest is True
+
+
+def test_parse_args_notify_channel():
+    assert parse_args([]).notify_channel is None
+    assert parse_args(["--notify_channel", "queue_counts"]).notify_channel == "queue_counts"
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,248 @@
+"""
+Unit tests for the partition management of the report_statusqueuemessagecount table.
+"""
+
+import datetime
+import sys
+import unittest
+from importlib.resources import files
+from unittest.mock import MagicMock, patch
+
+import psycopg
+import pytest
+
+from artemis_data_collector.artemis_data_collector import (
+    main,
+    maintain_partitions,
+    parse_args,
+    parse_partition_name,
+    partition_name,
+    partition_start,
+    shift_partition_start,
+)
+
+
+class TestPartitionNaming(unittest.TestCase):
+    def test_partition_start(self):
+        self.assertEqual(partition_start("month", datetime.date(2024, 5, 17)), datetime.date(2024, 5, 1))
+        # 2024-05-17 is a Friday
+        self.assertEqual(partition_start("week", datetime.date(2024, 5, 17)), datetime.date(2024, 5, 13))
+        with self.assertRaises(ValueError):
+            partition_start("day", datetime.date(2024, 5, 17))
+
+    def test_shift_partition_start(self):
+        self.assertEqual(shift_partition_start("month", datetime.date(2024, 11, 1), 3), datetime.date(2025, 2, 1))
+        self.assertEqual(shift_partition_start("month", datetime.date(2024, 1, 1), -1), datetime.date(2023, 12, 1))
+        self.assertEqual(shift_partition_start("week", datetime.date(2024, 12, 30), 1), datetime.date(2025, 1, 6))
+
+    def test_partition_name_roundtrip(self):
+        for interval, start, name in [
+            ("month", datetime.date(2024, 5, 1), "report_statusqueuemessagecount_p2024_05"),
+            # the week starting 2024-12-30 is week 1 of ISO year 2025
+            ("week", datetime.date(2024, 12, 30), "report_statusqueuemessagecount_p2025w01"),
+        ]:
+            self.assertEqual(partition_name(interval, start), name)
+            self.assertEqual(parse_partition_name(interval, name), start)
+
+        self.assertIsNone(parse_partition_name("month", "report_statusqueuemessagecount_p2025w01"))
+        self.assertIsNone(parse_partition_name("week", "report_statusqueuemessagecount_old"))
+
+
+class TestMaintainPartitions(unittest.TestCase):
+    def _mock_conn(self, existing):
+        conn = MagicMock()
+        cursor = conn.cursor.return_value.__enter__.return_value
+        cursor.fetchall.return_value = [(name,) for name in existing]
+        return conn, cursor
+
+    def test_create_upcoming(self):
+        conn, cursor = self._mock_conn(["report_statusqueuemessagecount_p2024_05"])
+
+        created, expired = maintain_partitions(conn, "month", premake=2, today=datetime.date(2024, 5, 17))
+
+        self.assertEqual(
+            created, ["report_statusqueuemessagecount_p2024_06", "report_statusqueuemessagecount_p2024_07"]
+        )
+        self.assertEqual(expired, [])
+        # one query for the existing partitions and one per created partition
+        self.assertEqual(cursor.execute.call_count, 3)
+        conn.commit.assert_called_once()
+
+    def test_drop_expired(self):
+        conn, cursor = self._mock_conn(
+            [
+                "report_statusqueuemessagecount_p2024_01",
+                "report_statusqueuemessagecount_p2024_02",
+                "report_statusqueuemessagecount_p2024_03",
+                "report_statusqueuemessagecount_p2024_04",
+                "report_statusqueuemessagecount_p2024_05",
+            ]
+        )
+
+        created, expired = maintain_partitions(conn, "month", premake=0, retention=2, today=datetime.date(2024, 5, 17))
+
+        self.assertEqual(created, [])
+        self.assertEqual(
+            expired, ["report_statusqueuemessagecount_p2024_01", "report_statusqueuemessagecount_p2024_02"]
+        )
+        statement = cursor.execute.call_args_list[-1].args[0].as_string()
+        self.assertTrue(statement.startswith("DROP TABLE"))
+
+    def test_detach_expired(self):
+        conn, cursor = self._mock_conn(
+            ["report_statusqueuemessagecount_p2024w18", "report_statusqueuemessagecount_p2024w20"]
+        )
+
+        created, expired = maintain_partitions(
+            conn, "week", premake=0, retention=1, detach=True, today=datetime.date(2024, 5, 17)
+        )
+
+        self.assertEqual(created, [])
+        self.assertEqual(expired, ["report_statusqueuemessagecount_p2024w18"])
+        statement = cursor.execute.call_args_list[-1].args[0].as_string()
+        self.assertIn("DETACH PARTITION", statement)
+
+    def test_retention_zero_keeps_current(self):
+        conn, _ = self._mock_conn(
+            ["report_statusqueuemessagecount_p2024_04", "report_statusqueuemessagecount_p2024_05"]
+        )
+
+        _, expired = maintain_partitions(conn, "month", premake=0, retention=0, today=datetime.date(2024, 5, 17))
+
+        self.assertEqual(expired, ["report_statusqueuemessagecount_p2024_04"])
+
+    def test_negative_rejected(self):
+        conn, cursor = self._mock_conn(["report_statusqueuemessagecount_p2024_05"])
+
+        for premake, retention in [(1, -1), (-1, None)]:
+            with self.assertRaises(ValueError):
+                maintain_partitions(
+                    conn, "month", premake=premake, retention=retention, today=datetime.date(2024, 5, 17)
+                )
+        cursor.execute.assert_not_called()
+
+
+class TestPartitionedTable(unittest.TestCase):
+    """Runs the partitioned table DDL and the partition maintenance against the PostgreSQL of docker compose,
+    in a scratch database"""
+
+    database_name = "workflow_partition_test"
+    connect_args = {"host": "localhost", "port": 5432, "user": "workflow", "password": "workflow"}
+
+    @classmethod
+    def setUpClass(cls):
+        with psycopg.connect(dbname="workflow", autocommit=True, **cls.connect_args) as conn:
+            conn.execute(f"DROP DATABASE IF EXISTS {cls.database_name}")
+            conn.execute(f"CREATE DATABASE {cls.database_name}")
+
+    @classmethod
+    def tearDownClass(cls):
+        with psycopg.connect(dbname="workflow", autocommit=True, **cls.connect_args) as conn:
+            conn.execute(f"DROP DATABASE IF EXISTS {cls.database_name}")
+
+    def partitions(self, conn):
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT c.relname FROM pg_catalog.pg_inherits i "
+                "JOIN pg_catalog.pg_class c ON c.oid = i.inhrelid "
+                "WHERE i.inhparent = 'public.report_statusqueuemessagecount'::regclass ORDER BY c.relname"
+            )
+            return [row[0] for row in cur.fetchall()]
+
+    def test_maintain_partitions(self):
+        with psycopg.connect(dbname=self.database_name, **self.connect_args) as conn:
+            with conn.cursor() as cur:
+                cur.execute(files("artemis_data_collector.sql").joinpath("report_statusqueue.sql").read_text())
+                cur.execute(
+                    files("artemis_data_collector.sql")
+                    .joinpath("report_statusqueuemessagecount_partitioned.sql")
+                    .read_text()
+                )
+                cur.execute(
+                    "INSERT INTO public.report_statusqueue (name, is_workflow_input) VALUES ('TEST_QUEUE', true) "
+                    "RETURNING id"
+                )
+                queue_id = cur.fetchone()[0]
+            conn.commit()
+
+            created, expired = maintain_partitions(conn, "month", premake=2, today=datetime.date(2024, 5, 17))
+            self.assertEqual(
+                created,
+                [
+                    "report_statusqueuemessagecount_p2024_05",
+                    "report_statusqueuemessagecount_p2024_06",
+                    "report_statusqueuemessagecount_p2024_07",
+                ],
+            )
+            self.assertEqual(expired, [])
+            self.assertEqual(self.partitions(conn), created)
+
+            # rows are routed to the partition of their created_on
+            with conn.cursor() as cur:
+                cur.execute(
+                    "INSERT INTO public.report_statusqueuemessagecount (queue_id, message_count, created_on) "
+                    "VALUES (%s, 3, '2024-05-31 23:59:59+00'), (%s, 4, '2024-06-15 12:00:00+00')",
+                    (queue_id, queue_id),
+                )
+                cur.execute("SELECT count(*) FROM public.report_statusqueuemessagecount_p2024_06")
+                self.assertEqual(cur.fetchone()[0], 1)
+            conn.commit()
+
+            # two months later, keeping one past partition and detaching the older ones
+            created, expired = maintain_partitions(
+                conn, "month", premake=1, retention=1, detach=True, today=datetime.date(2024, 7, 2)
+            )
+            self.assertEqual(created, ["report_statusqueuemessagecount_p2024_08"])
+            self.assertEqual(expired, ["report_statusqueuemessagecount_p2024_05"])
+            self.assertEqual(
+                self.partitions(conn),
+                [
+                    "report_statusqueuemessagecount_p2024_06",
+                    "report_statusqueuemessagecount_p2024_07",
+                    "report_statusqueuemessagecount_p2024_08",
+                ],
+            )
+            with conn.cursor() as cur:
+                # the detached partition still holds its rows, but is no longer part of the table
+                cur.execute("SELECT count(*) FROM public.report_statusqueuemessagecount_p2024_05")
+                self.assertEqual(cur.fetchone()[0], 1)
+                cur.execute("SELECT count(*) FROM public.report_statusqueuemessagecount")
+                self.assertEqual(cur.fetchone()[0], 1)
+
+            # and dropping
+            created, expired = maintain_partitions(
+                conn, "month", premake=1, retention=1, today=datetime.date(2024, 8, 1)
+            )
+            self.assertEqual(created, ["report_statusqueuemessagecount_p2024_09"])
+            self.assertEqual(expired, ["report_statusqueuemessagecount_p2024_06"])
+            with conn.cursor() as cur:
+                cur.execute("SELECT to_regclass('public.report_statusqueuemessagecount_p2024_06')")
+                self.assertIsNone(cur.fetchone()[0])
+
+
+@pytest.mark.parametrize("option", ["--partition_premake", "--partition_retention"])
+def test_main_rejects_negative_partition_options(option):
+    argv = ["artemis_data_collector", "--partition_interval", "month", "--maintain_partitions", option, "-1"]
+    with (
+        patch.object(sys, "argv", argv),
+        patch("artemis_data_collector.artemis_data_collector.setup_logging"),
+        patch("artemis_data_collector.artemis_data_collector.psycopg.connect") as mock_connect,
+    ):
+        assert main() == 1
+    mock_connect.assert_not_called()
+
+
+def test_parse_args_partition():
+    args = parse_args([])
+    assert args.partition_interval is None
+    assert args.partition_retention is None
+    assert args.partition_detach is False
+
+    args = parse_args(["--partition_interval", "week", "--partition_retention", "8", "--partition_detach"])
+    assert args.partition_interval == "week"
+    assert args.partition_retention == 8
+    assert args.partition_detach is True
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,169 @@
+"""
+Unit tests for the STOMP management transport of the Artemis Data Collector.
+"""
+
+import json
+import unittest
+from unittest.mock import Mock, patch
+
+import pytest
+import stomp
+from stomp.utils import Frame
+
+from artemis_data_collector.artemis_data_collector import (
+    ArtemisDataCollector,
+    StompManagementClient,
+    parse_args,
+    parse_endpoint,
+)
+
+
+def mock_management_broker(mock_connection_class, addresses=(), queues=(), fail=False):
+    """Makes the mocked stomp Connection reply like the Artemis management address.
+
+    ``addresses`` are the AddressNames and ``queues`` the (address, message count) returned by listQueues. With
+    ``fail`` every request replies with an error."""
+    mock_conn = mock_connection_class.return_value
+    mock_conn.is_connected.return_value = True
+
+    def send(destination, body, headers):
+        assert destination == "activemq.management"
+        assert headers["_AMQ_ResourceName"] == "broker"
+        reply_headers = {"correlation-id": headers["correlation-id"]}
+        if fail:
+            reply_headers["_AMQ_OperationSucceeded"] = "false"
+            reply_body = "internal error"
+        elif headers.get("_AMQ_Attribute") == "AddressNames":
+            reply_headers["_AMQ_OperationSucceeded"] = "true"
+            reply_body = json.dumps([list(addresses)])
+        else:
+            assert headers["_AMQ_OperationName"] == "listQueues"
+            _, page, page_size = json.loads(body)
+            data = [
+                {"name": f"{address}.{i}", "address": address, "messageCount": str(count)}
+                for i, (address, count) in enumerate(queues)
+            ][(page - 1) * page_size : page * page_size]
+            reply_headers["_AMQ_OperationSucceeded"] = "true"
+            reply_body = json.dumps([json.dumps({"data": data, "count": len(queues)})])
+        listener = mock_conn.set_listener.call_args.args[1]
+        listener.on_message(Frame("MESSAGE", reply_headers, reply_body))
+
+    mock_conn.send.side_effect = send
+    return mock_conn
+
+
+@patch("artemis_data_collector.artemis_data_collector.stomp.Connection")
+class TestStompManagementClient(unittest.TestCase):
+    def setUp(self):
+        self.client = StompManagementClient([("primary", 61613), ("failover", 61613)], "admin", "admin", 0.1)
+
+    def test_get_address_names(self, mock_connection_class):
+        mock_conn = mock_management_broker(mock_connection_class, addresses=["TEST_QUEUE", "DLQ"])
+
+        self.assertEqual(self.client.get_address_names(), ["TEST_QUEUE", "DLQ"])
+        mock_connection_class.assert_called_once()
+        self.assertEqual(mock_connection_class.call_args.kwargs["host_and_ports"], self.client.endpoints)
+        mock_conn.subscribe.assert_called_once()
+
+    def test_get_message_counts(self, mock_connection_class):
+        mock_conn = mock_management_broker(
+            mock_connection_class, queues=[("TEST_QUEUE", 4), ("TEST_QUEUE", 1), ("OTHER", 0), ("DLQ", 9)]
+        )
+
+        counts = self.client.get_message_counts(["TEST_QUEUE", "OTHER", "MISSING"])
+
+        # queues of the same address are summed, addresses without queues are left out
+        self.assertEqual(counts, {"TEST_QUEUE": 5, "OTHER": 0})
+        # all counts are read with a single request
+        mock_connection_class.assert_called_once()
+        self.assertEqual(mock_conn.send.call_count, 1)
+
+    def test_get_message_counts_pages(self, mock_connection_class):
+        mock_conn = mock_management_broker(mock_connection_class, queues=[("TEST_QUEUE", 1)] * 2500)
+
+        with patch("artemis_data_collector.artemis_data_collector.LIST_QUEUES_PAGE_SIZE", 1000):
+            counts = self.client.get_message_counts(["TEST_QUEUE"])
+
+        self.assertEqual(counts, {"TEST_QUEUE": 2500})
+        self.assertEqual(mock_conn.send.call_count, 3)
+
+    def test_operation_failed(self, mock_connection_class):
+        mock_management_broker(mock_connection_class, fail=True)
+
+        with self.assertLogs(level="ERROR") as cm:
+            self.assertIsNone(self.client.get_message_counts(["TEST_QUEUE"]))
+
+        # a failed operation is not a connection problem, no traceback and no reconnect
+        self.assertEqual(len(cm.records), 1)
+        self.assertIsNone(cm.records[0].exc_info)
+        mock_connection_class.assert_called_once()
+
+    def test_timeout_reconnects(self, mock_connection_class):
+        mock_conn = mock_connection_class.return_value
+        mock_conn.is_connected.return_value = True
+        # the broker never replies
+
+        self.assertIsNone(self.client.get_address_names())
+        # connected, timed out, reconnected and timed out again
+        self.assertEqual(mock_connection_class.call_count, 2)
+        self.assertEqual(mock_conn.disconnect.call_count, 2)
+
+    def test_connect_failed(self, mock_connection_class):
+        mock_connection_class.return_value.connect.side_effect = stomp.exception.ConnectFailedException()
+
+        self.assertIsNone(self.client.get_message_counts(["TEST_QUEUE"]))
+
+
+def test_late_reply_discarded():
+    client = StompManagementClient([("primary", 61613)], "admin", "admin", 0.1)
+    client._expected_correlation_id = "1"
+    client.on_message(Frame("MESSAGE", {"correlation-id": "0"}, "[1]"))
+    assert client._reply is None
+
+
+@patch("artemis_data_collector.artemis_data_collector.stomp.Connection")
+@patch("artemis_data_collector.artemis_data_collector.psycopg.connect")
+@patch("artemis_data_collector.artemis_data_collector.requests.Session")
+class TestArtemisDataCollectorStomp(unittest.TestCase):
+    def setUp(self):
+        self.config = Mock()
+        self.config.artemis_transport = "stomp"
+        self.config.artemis_stomp_endpoint = "primary:61613"
+        self.config.artemis_stomp_failover_endpoint = "failover:61613"
+        self.config.artemis_failover_url = None
+        self.config.queue_list = ["TEST_QUEUE"]
+        self.config.http_timeout = 0.1
+
+    def test_collect_data(self, mock_session_class, mock_connect, mock_connection_class):
+        mock_cursor = mock_connect.return_value.cursor.return_value.__enter__.return_value
+        mock_cursor.fetchall.return_value = [(1, "TEST_QUEUE")]
+        mock_management_broker(mock_connection_class, addresses=["TEST_QUEUE"], queues=[("TEST_QUEUE", 7)])
+
+        adc = ArtemisDataCollector(self.config)
+        data = adc.collect_data()
+
+        self.assertEqual(data, [(1, 7)])
+        self.assertEqual(adc._management.endpoints, [("primary", 61613), ("failover", 61613)])
+        # Jolokia is not used
+        mock_session_class.return_value.get.assert_not_called()
+
+
+def test_parse_endpoint():
+    assert parse_endpoint("localhost:61613") == ("localhost", 61613)
+    with pytest.raises(ValueError):
+        parse_endpoint("localhost")
+
+
+def test_parse_args_stomp():
+    args = parse_args([])
+    assert args.artemis_transport == "jolokia"
+    assert args.artemis_stomp_endpoint == "localhost:61613"
+    assert args.artemis_stomp_failover_endpoint is None
+
+    args = parse_args(["--artemis_transport", "stomp", "--artemis_stomp_failover_endpoint", "backup:61613"])
+    assert args.artemis_transport == "stomp"
+    assert args.artemis_stomp_failover_endpoint == "backup:61613"
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+import json
+import socket
+import sys
+import unittest
+from unittest.mock import Mock, patch
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+import pytest
+
+from artemis_data_collector.artemis_data_collector import ArtemisDataCollector, main, parse_args
+from artemis_data_collector.history import HistoryStore, start_history_server
+
+
+def filled_store():
+    store = HistoryStore(max_age=100)
+    for t in range(0, 60, 10):
+        store.add(1000.0 + t, {"TEST_QUEUE": t, "TEST_QUEUE2": 1})
+    return store
+
+
+@patch("artemis_data_collector.history.time.time", return_value=1060.0)
+class TestHistoryStore(unittest.TestCase):
+    def test_query_range(self, _mock_time):
+        store = filled_store()
+
+        self.assertEqual(store.queues(), ["TEST_QUEUE", "TEST_QUEUE2"])
+        self.assertEqual(len(store.query("TEST_QUEUE")), 6)
+        self.assertEqual(store.query("TEST_QUEUE", start=1020, end=1040), [[1020, 20], [1030, 30], [1040, 40]])
+        with self.assertRaises(KeyError):
+            store.query("DOES_NOT_EXIST")
+
+    def test_downsample(self, _mock_time):
+        store = filled_store()
+
+        # buckets [990, 1020), [1020, 1050) and [1050, 1080)
+        self.assertEqual(store.query("TEST_QUEUE", step=30), [[990, 10], [1020, 40], [1050, 50]])
+        self.assertEqual(store.query("TEST_QUEUE", step=30, agg="mean"), [[990, 5], [1020, 30], [1050, 50]])
+        self.assertEqual(store.query("TEST_QUEUE", start=1015, end=1035, step=30, agg="max"), [[1020, 30]])
+
+    def test_eviction(self, mock_time):
+        store = filled_store()
+        mock_time.return_value = 1150.0
+        store.add(1150.0, {"TEST_QUEUE": 7})
+
+        # only samples newer than 1150 - 100 are kept
+        self.assertEqual(store.query("TEST_QUEUE"), [[1050, 50], [1150, 7]])
+        self.assertEqual(store.query("TEST_QUEUE2"), [[1050, 1]])
+
+    def test_expired_without_add(self, mock_time):
+        store = filled_store()
+
+        # no sample was added since, but only samples newer than now - 100 are returned
+        mock_time.return_value = 1130.0
+        self.assertEqual(store.query("TEST_QUEUE"), [[1030, 30], [1040, 40], [1050, 50]])
+        self.assertEqual(store.query("TEST_QUEUE", start=1000, end=1040), [[1030, 30], [1040, 40]])
+        mock_time.return_value = 1200.0
+        self.assertEqual(store.query("TEST_QUEUE"), [])
+
+
+class TestHistoryServer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.time_patcher = patch("artemis_data_collector.history.time.time", return_value=1060.0)
+        cls.time_patcher.start()
+        cls.server = start_history_server(filled_store(), "127.0.0.1", 0)
+        cls.url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.time_patcher.stop()
+
+    def get(self, path):
+        with urlopen(self.url + path, timeout=5) as response:
+            return json.load(response)
+
+    def test_queues(self):
+        self.assertEqual(self.get("/queues"), {"queues": ["TEST_QUEUE", "TEST_QUEUE2"]})
+
+    def test_history(self):
+        self.assertEqual(
+            self.get("/history?queue=TEST_QUEUE&start=1030&step=20&agg=max"),
+            {"queue": "TEST_QUEUE", "points": [[1020, 30], [1040, 50]]},
+        )
+        self.assertEqual(
+            self.get("/history?queue=TEST_QUEUE&last=15"),
+            {"queue": "TEST_QUEUE", "points": [[1050, 50]]},
+        )
+
+    def test_errors(self):
+        for path, status in [
+            ("/history?queue=DOES_NOT_EXIST", 404),
+            ("/history", 400),
+            ("/history?queue=TEST_QUEUE&step=abc", 400),
+            ("/history?queue=TEST_QUEUE&agg=median", 400),
+            ("/history?queue=TEST_QUEUE&start=1030&last=60", 400),
+            ("/other", 404),
+        ]:
+            with self.assertRaises(HTTPError) as cm:
+                self.get(path)
+            self.assertEqual(cm.exception.code, status, path)
+            cm.exception.close()
+
+
+@pytest.mark.usefixtures("mock_backend")
+def test_add_to_history():
+    config = Mock()
+    config.artemis_failover_url = None
+    config.queue_list = ["TEST_QUEUE"]
+
+    adc = ArtemisDataCollector(config, history=HistoryStore())
+    with patch("artemis_data_collector.artemis_data_collector.time.time", return_value=1000.0):
+        adc.add_to_history([(1, 5)])
+
+    with patch("artemis_data_collector.history.time.time", return_value=1000.0):
+        assert adc.history.query("TEST_QUEUE") == [[1000.0, 5]]
+
+
+def test_main_history_port_in_use():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        sock.listen()
+        argv = ["artemis_data_collector", "--history_host", "127.0.0.1", "--history_port", str(sock.getsockname()[1])]
+        with (
+            patch.object(sys, "argv", argv),
+            patch("artemis_data_collector.artemis_data_collector.setup_logging"),
+            patch("artemis_data_collector.artemis_data_collector.ArtemisDataCollector") as mock_collector,
+        ):
+            assert main() == 1
+    mock_collector.assert_not_called()
+
+
+def test_parse_args_history():
+    args = parse_args([])
+    assert args.history_port is None
+    assert args.history_max_age == 3600
+
+    args = parse_args(["--history_port", "8080", "--history_max_age", "600"])
+    assert args.history_port == 8080
+    assert args.history_max_age == 600
+
+
+if __name__ == "__main__":
+    unittest.main()
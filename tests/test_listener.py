@@ -0,0 +1,62 @@
+import unittest
+from unittest.mock import Mock, patch
+
+from artemis_data_collector.listener import QueueCountListener
+
+
+class TestQueueCountListener(unittest.TestCase):
+    def test_dispatch_fan_out(self):
+        listener = QueueCountListener("queue_counts")
+        first = listener.subscribe(Mock())
+        second = listener.subscribe(Mock())
+
+        listener.dispatch('{"counts":{"1":3,"2":0},"interval":30}')
+
+        first.assert_called_once_with({1: 3, 2: 0}, 30)
+        second.assert_called_once_with({1: 3, 2: 0}, 30)
+
+        listener.unsubscribe(first)
+        listener.dispatch('{"counts":null}')
+        first.assert_called_once()
+        second.assert_called_with(None, None)
+
+    def test_failing_callback(self):
+        listener = QueueCountListener("queue_counts")
+        listener.subscribe(Mock(side_effect=RuntimeError("consumer failed")))
+        callback = listener.subscribe(Mock())
+
+        with self.assertLogs(level="ERROR"):
+            listener.dispatch('{"counts":{"1":3}}')
+
+        callback.assert_called_once_with({1: 3}, None)
+
+    def test_invalid_payload(self):
+        listener = QueueCountListener("queue_counts")
+        callback = listener.subscribe(Mock())
+
+        with self.assertLogs(level="ERROR"):
+            listener.dispatch("not json")
+
+        callback.assert_not_called()
+
+    @patch("artemis_data_collector.listener.psycopg.connect")
+    def test_run(self, mock_connect):
+        listener = QueueCountListener("queue_counts", dbname="workflow")
+        callback = listener.subscribe(Mock())
+        mock_conn = mock_connect.return_value.__enter__.return_value
+
+        def notifies(**_kwargs):
+            listener._stop.set()
+            return [Mock(payload='{"counts":{"1":3}}')]
+
+        mock_conn.notifies.side_effect = notifies
+
+        listener.run()
+
+        mock_connect.assert_called_once_with(autocommit=True, dbname="workflow")
+        self.assertEqual(mock_conn.execute.call_args.args[0].as_string(), 'LISTEN "queue_counts"')
+        callback.assert_called_once_with({1: 3}, None)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,179 @@
+import json
+import logging
+import queue
+import sys
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from artemis_data_collector.log import AsyncLogging, JsonFormatter, RateLimitFilter, format_period, setup_logging
+
+
+def make_record(msg, level=logging.ERROR, args=(), exc_info=None):
+    return logging.LogRecord("AtremisDataCollector", level, __file__, 1, msg, args, exc_info)
+
+
+@patch("artemis_data_collector.log.time.monotonic")
+class TestRateLimitFilter(unittest.TestCase):
+    def test_burst_then_summary(self, mock_monotonic):
+        rate_limit = RateLimitFilter(period=300, burst=2)
+        mock_monotonic.return_value = 0
+
+        passed = [rate_limit.filter(make_record("Primary broker connection error")) for _ in range(5)]
+        self.assertEqual(passed, [True, True, False, False, False])
+        # the period is not over yet
+        mock_monotonic.return_value = 299
+        self.assertEqual(rate_limit.summaries(), [])
+
+        # the period is over, even without a new record
+        mock_monotonic.return_value = 300
+        summaries = rate_limit.summaries()
+        self.assertEqual(len(summaries), 1)
+        self.assertEqual(summaries[0].getMessage(), "Primary broker connection error (x5 in last 5m)")
+        self.assertEqual(summaries[0].suppressed, 3)
+
+        # a much later repeat starts a new period and is not annotated
+        mock_monotonic.return_value = 86400
+        record = make_record("Primary broker connection error")
+        self.assertTrue(rate_limit.filter(record))
+        self.assertEqual(record.getMessage(), "Primary broker connection error")
+        self.assertEqual(rate_limit.summaries(), [])
+
+    def test_summary_of_ended_period_kept(self, mock_monotonic):
+        rate_limit = RateLimitFilter(period=60, burst=1)
+        mock_monotonic.return_value = 0
+        for _ in range(3):
+            rate_limit.filter(make_record("Primary broker connection error"))
+
+        # a new period starts before the summaries were collected
+        mock_monotonic.return_value = 61
+        self.assertTrue(rate_limit.filter(make_record("Primary broker connection error")))
+
+        summaries = rate_limit.summaries()
+        self.assertEqual(
+            [record.getMessage() for record in summaries], ["Primary broker connection error (x3 in last 1m)"]
+        )
+
+    def test_key_is_message_template(self, mock_monotonic):
+        rate_limit = RateLimitFilter(period=60, burst=1)
+        mock_monotonic.return_value = 0
+
+        self.assertTrue(rate_limit.filter(make_record("HTTP error %s", args=(500,))))
+        self.assertFalse(rate_limit.filter(make_record("HTTP error %s", args=(503,))))
+        self.assertTrue(rate_limit.filter(make_record("JSON decode error")))
+
+    def test_info_not_limited(self, mock_monotonic):
+        rate_limit = RateLimitFilter(period=60, burst=1)
+        mock_monotonic.return_value = 0
+
+        self.assertTrue(all(rate_limit.filter(make_record("Collected", level=logging.INFO)) for _ in range(10)))
+
+    def test_summaries(self, mock_monotonic):
+        rate_limit = RateLimitFilter(period=60, burst=1)
+        mock_monotonic.return_value = 0
+        for _ in range(4):
+            rate_limit.filter(make_record("Failover broker error: %s", args=({"status": 500},)))
+
+        self.assertEqual(rate_limit.summaries(), [])
+        summaries = rate_limit.summaries(ended_only=False)
+        self.assertEqual(len(summaries), 1)
+        self.assertEqual(summaries[0].getMessage(), "Failover broker error: {'status': 500} (x4 in last 1m)")
+        self.assertEqual(rate_limit.summaries(ended_only=False), [])
+
+
+class TestJsonFormatter(unittest.TestCase):
+    def test_format(self):
+        try:
+            raise ValueError("bad")
+        except ValueError:
+            record = make_record("Queue %s not found", args=("TEST_QUEUE",), exc_info=sys.exc_info())
+
+        entry = json.loads(JsonFormatter().format(record))
+
+        self.assertEqual(entry["level"], "ERROR")
+        self.assertEqual(entry["logger"], "AtremisDataCollector")
+        self.assertEqual(entry["message"], "Queue TEST_QUEUE not found")
+        self.assertIn("ValueError: bad", entry["exception"])
+        self.assertNotIn("suppressed", entry)
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+class TestAsyncLogging(unittest.TestCase):
+    @patch("artemis_data_collector.log.time.monotonic")
+    def test_flush_ended_periods(self, mock_monotonic):
+        mock_monotonic.return_value = 0
+        rate_limit = RateLimitFilter(period=60, burst=1)
+        handler = ListHandler()
+        async_logging = AsyncLogging(queue.SimpleQueue(), handler, rate_limit, flush_interval=0.01)
+        async_logging.start()
+        try:
+            for _ in range(3):
+                rate_limit.filter(make_record("Primary broker connection error"))
+
+            # written by the listener once the period is over, without waiting for another record
+            mock_monotonic.return_value = 60
+            deadline = time.time() + 5
+            while not handler.records and time.time() < deadline:
+                time.sleep(0.01)
+        finally:
+            async_logging.stop()
+
+        self.assertEqual(
+            [record.getMessage() for record in handler.records], ["Primary broker connection error (x3 in last 1m)"]
+        )
+
+
+class TestSetupLogging(unittest.TestCase):
+    def test_async_file_logging(self):
+        root = logging.getLogger()
+        handlers = list(root.handlers)
+        level = root.level
+        self.addCleanup(root.setLevel, level)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = f"{tmpdir}/collector.log"
+            async_logging = setup_logging("INFO", filename, "json", rate_limit_period=300, rate_limit_burst=1)
+            try:
+                logger = logging.getLogger("AtremisDataCollector")
+                for _ in range(3):
+                    logger.error("Primary broker connection error")
+                logger.info("Exiting")
+            finally:
+                async_logging.stop()
+                for handler in list(root.handlers):
+                    if handler not in handlers:
+                        root.removeHandler(handler)
+                async_logging.handlers[0].close()
+
+            with open(filename) as f:
+                entries = [json.loads(line) for line in f]
+
+        self.assertEqual(
+            [entry["message"] for entry in entries],
+            [
+                "Primary broker connection error",
+                "Exiting",
+                # written when logging is stopped
+                "Primary broker connection error (x3 in last 5m)",
+            ],
+        )
+        self.assertEqual(entries[-1]["suppressed"], 2)
+
+
+def test_format_period():
+    assert format_period(300) == "5m"
+    assert format_period(7200) == "2h"
+    assert format_period(45) == "45s"
+
+
+if __name__ == "__main__":
+    unittest.main()